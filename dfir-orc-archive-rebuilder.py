@@ -20,18 +20,51 @@ Known limitations:
   - This tool fails to extract artefacts if the targeted filepath is bigger than the OS lenght limitation.
 """
 
+import gc
 import io
 import os
+import re
 import csv
-import codecs
 import typing
-import tomllib
+import shutil
+import bisect
+import fnmatch
 import logging
 import pathlib
+import operator
+import calendar
 import datetime
+import tempfile
+import functools
+import contextlib
+import multiprocessing
+import concurrent.futures
 
-from py7zr import SevenZipFile, Bad7zFile
+# Buffer size used to copy sub archives to temporary files
+_COPY_BUFFER_SIZE = 1024 * 1024
 
+# Buffer size and rows batch size used to log the artefacts non extracted
+_LOG_BUFFER_SIZE = 1024 * 1024
+_LOG_BATCH_SIZE = 1024
+
+# Maximum number of processes used when the jobs count is automatic
+_MAX_JOBS = 12
+
+# Arguments shared by the sub 7z files and log file of the worker process, bound by _init_worker
+_worker_context = {}
+_worker_log_path = None
+
+# Files must be written as-is on Windows
+_O_BINARY = getattr(os, 'O_BINARY', 0)
+
+# SnapshotID of samples not collected from a volume shadow copy
+_NULL_SNAPSHOT = "{00000000-0000-0000-0000-000000000000}"
+
+# Format of the GetThis.csv dates, and the separators positions checked before slicing them
+_DATE_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+_DATE_SEPARATORS = ((4, '-'), (7, '-'), (10, ' '), (13, ':'), (16, ':'), (19, '.'))
+
+@functools.lru_cache(maxsize=4096)
 def _naming_convention_volume_folder(volume_id, snapshot_id):
   """
   This function defines the naming convention used by this script for the root directory where artefacts are created.
@@ -43,6 +76,7 @@ def _naming_convention_volume_folder(volume_id, snapshot_id):
 
   This folder name will end up under the destination_folder given in the script parameter.
   The volume_id will be replaced later (by another function) if there is a mounted drive found in a volstats.csv file.
+  Results are cached as samples of an archive share only a few volumes and snapshots.
 
   Args:
     volume_id: Volume ID from a sample in GetThis.csv.
@@ -51,39 +85,167 @@ def _naming_convention_volume_folder(volume_id, snapshot_id):
   Returns:
     The volume folder name where the sample will be saved.
   """
-  if snapshot_id == "{00000000-0000-0000-0000-000000000000}":
-    return volume_id
-  else:
-    return f'{volume_id} (vsc {snapshot_id})'
+  return volume_id if snapshot_id == _NULL_SNAPSHOT else f'{volume_id} (vsc {snapshot_id})'
+
+
+@contextlib.contextmanager
+def _gc_disabled() -> typing.Iterator[None]:
+  """
+  This context manager disables the cyclic garbage collector and restores it when leaving.
+  Building many objects that are all kept (like the GetThis.csv mapping) triggers collections which can't free anything.
+  """
+  gc_was_enabled = gc.isenabled()
+  gc.disable()
+  try:
+    yield
+  finally:
+    if gc_was_enabled:
+      gc.enable()
+
+
+def _parse_timestamp(date: str) -> typing.Optional[int]:
+  """
+  This function converts a GetThis.csv date (`%Y-%m-%d %H:%M:%S.%f`, in UTC) to a POSIX timestamp. Milliseconds are dropped.
+  An empty date gives None, so no time is set for the artefact. Other dates not matching the format (like a missing fraction or an hour out of range) raise a ValueError, as `datetime.strptime` does.
+
+  The fraction of seconds is only checked, the rest of the date is converted by `_parse_seconds`.
+
+  Args:
+    date: A date from GetThis.csv (like LastModificationDate or LastAccessDate).
+
+  Returns:
+    The POSIX timestamp in seconds, or None for an empty date.
+  """
+  if not date:
+    return None
+
+  # Like %f, the fraction of seconds has 1 to 6 digits
+  fraction = date[20:]
+  if not 0 < len(fraction) <= 6 or not (fraction.isascii() and fraction.isdigit()):
+    raise ValueError(f'time data {date!r} does not match format {_DATE_FORMAT!r}')
+
+  return _parse_seconds(date[:20])
+
+
+@functools.lru_cache(maxsize=65536)
+def _parse_seconds(date: str) -> int:
+  """
+  This function converts the `%Y-%m-%d %H:%M:%S.` part of a GetThis.csv date (in UTC) to a POSIX timestamp.
+
+  The separators positions are checked, then the date fields are sliced and converted directly instead of using `datetime.strptime` which is slow. The fields ranges are checked by `datetime.datetime`.
+  Results are cached as many samples share the same dates. The milliseconds are not part of the key, so the dates of a same second share the entry.
+
+  Args:
+    date: The first 20 characters of a date from GetThis.csv.
+
+  Returns:
+    The POSIX timestamp in seconds.
+  """
+  digits = date[0:4] + date[5:7] + date[8:10] + date[11:13] + date[14:16] + date[17:19]
+  if len(date) != 20 or not (digits.isascii() and digits.isdigit()) or any(date[index] != separator for index, separator in _DATE_SEPARATORS):
+    raise ValueError(f'time data {date!r} does not match format {_DATE_FORMAT!r}')
+
+  return calendar.timegm(datetime.datetime(int(date[0:4]), int(date[5:7]), int(date[8:10]), int(date[11:13]), int(date[14:16]), int(date[17:19])).timetuple())
+
+
+def _compile_patterns(
+  patterns: list
+) -> typing.Optional[re.Pattern]:
+  """
+  This function compiles a list of fnmatch patterns (like `*.evtx`) in a single case insensitive regular expression, as windows paths are.
+
+  Args:
+    patterns: The fnmatch patterns.
+
+  Returns:
+    The compiled regular expression matching any of the patterns, or None if there is no pattern.
+  """
+  if not patterns:
+    return None
+
+  return re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns), re.IGNORECASE)
 
 
 def _parse_getthis(
   getthis_content: io.BytesIO,
-  destination_folder: pathlib.Path
+  destination_folder: pathlib.Path,
+  include: re.Pattern = None,
+  exclude: re.Pattern = None
 ) -> dict:
   """
   This function returns the real path for each SampleName from the GetThis.csv file content given in parameter in a dictionnary.
 
   For each artefacts (aka SampleName) in GetThis.csv, the function returns the real path where to save it. It appends the root folder name, using _naming_convention_volume_folder function and changes windows path format to unix.
+  The file is read row by row with the csv module, locating the columns once from the header.
+  Invalid dates are logged and give None, so no time is set for the artefact (see `_parse_timestamp`).
+  Artefacts can be filtered on their original path (with unix separators, like `/Windows/System32/winevt/Logs/Security.evtx`) with `include` and `exclude` patterns (see `_compile_patterns`).
 
   Args:
     getthis_content: The GetThis.csv file content.
     destination_folder: The destination path where to save artefacts.
+    include: If given, only artefacts with an original path matching it are kept.
+    exclude: If given, artefacts with an original path matching it are dropped.
 
   Returns:
-    A dictionnary where each SampleName will have its targeted file path
+    A dictionnary where each SampleName will have its targeted file path (as a string)
   """
 
   result = {}
 
-  getthis = csv.DictReader(codecs.getreader('utf-8-sig')(getthis_content))
-
-  for row in getthis:
-    result[row['SampleName'].replace('\\', '/')] = {
-      'path': destination_folder.joinpath(_naming_convention_volume_folder(row['VolumeID'], row['SnapshotID']), row['FullName'].replace('\\', '/')[1:]),
-      'mtime': int(datetime.datetime.strptime(row['LastModificationDate'], '%Y-%m-%d %H:%M:%S.%f').timestamp()),
-      'atime': int(datetime.datetime.strptime(row['LastAccessDate'], '%Y-%m-%d %H:%M:%S.%f').timestamp())
-    }
+  # Paths are built as strings, cheaper than pathlib objects
+  destination = str(destination_folder)
+
+  # Pause the garbage collector while building the mapping, as all created objects are kept
+  with _gc_disabled():
+
+    # Decode with the C implemented io.TextIOWrapper, newline='' is required by the csv module
+    getthis_text = io.TextIOWrapper(getthis_content, encoding='utf-8-sig', newline='')
+    getthis = csv.reader(getthis_text)
+    parse_timestamp = _parse_timestamp
+    naming_convention_volume_folder = _naming_convention_volume_folder
+
+    # Locate the columns once from the header (an empty file has no artefact)
+    header = next(getthis, [])
+    if not header:
+      getthis_text.detach()
+      return result
+
+    sample_name_index = header.index('SampleName')
+    volume_id_index = header.index('VolumeID')
+    snapshot_id_index = header.index('SnapshotID')
+    full_name_index = header.index('FullName')
+    mtime_index = header.index('LastModificationDate')
+    atime_index = header.index('LastAccessDate')
+
+    # Paths separators are changed with str.replace, which is much faster than str.translate for a single character
+    for row in getthis:
+      # Skip blank lines
+      if not row:
+        continue
+
+      original_path = row[full_name_index].replace('\\', '/')
+
+      # Filter artefacts on their original path
+      if (include is not None and not include.match(original_path)) or (exclude is not None and exclude.match(original_path)):
+        continue
+
+      sample_name = row[sample_name_index].replace('\\', '/')
+
+      # An invalid date doesn't stop the extraction, the artefact is written without setting its times
+      try:
+        mtime, atime = parse_timestamp(row[mtime_index]), parse_timestamp(row[atime_index])
+      except ValueError as err:
+        logging.warning('Invalid date for %s, its times won\'t be set\n%s', sample_name, err)
+        mtime = atime = None
+
+      result[sample_name] = {
+        'path': os.path.join(destination, naming_convention_volume_folder(row[volume_id_index], row[snapshot_id_index]), original_path[1:]),
+        'mtime': mtime,
+        'atime': atime
+      }
+
+    # Give back the content without closing it
+    getthis_text.detach()
 
   return result
 
@@ -102,30 +264,40 @@ def _parse_volstats(
 
   result = {}
 
-  volstats = csv.DictReader(codecs.getreader('utf-8-sig')(volstats_content))
+  # Decode with the C implemented io.TextIOWrapper, newline='' is required by the csv module
+  volstats_text = io.TextIOWrapper(volstats_content, encoding='utf-8-sig', newline='')
+  volstats = csv.reader(volstats_text)
+
+  # Locate the columns once from the header
+  header = next(volstats, [])
+  if 'VolumeID' in header and 'MountPoint' in header:
+    volume_id_index = header.index('VolumeID')
+    mount_point_index = header.index('MountPoint')
+
+    for row in volstats:
+      # For each row if there is a MountPoint given, save it. (Keep only the letter without ':')
+      if len(row) > mount_point_index and row[mount_point_index]:
+        result[row[volume_id_index]] = row[mount_point_index][0]
 
-  for row in volstats:
-    # For each row if there is a MountPoint given, save it. (Keep only the letter without ':')
-    if row.get('MountPoint', ''):
-      result[row['VolumeID']] = row['MountPoint'][0]
+  # Give back the content without closing it
+  volstats_text.detach()
 
   return result
 
 
 def _write_file(
-  file_path: pathlib.Path,
+  file_path: typing.Union[str, pathlib.Path],
   content: io.BytesIO,
-  atime: int = None,
-  mtime: int = None
+  create_directory: bool = True
 ) -> bool:
   """
   This function write the given file content in the given file path. It creates the diretory tree if non existing. Fails if the file already exists or due any other IO errors.
+  The m.a times of the file are not set here, they are set once all files are written (see `_apply_timestamps`).
 
   Args:
     file_path: The target file path
     content: The content of the file to write
-    atime: The access time to set for the created file
-    mtime: The modified time to set for the created file
+    create_directory: Indicates if the function should create the parent directory. Disable it when the directory was created for a previous file.
 
   Returns:
     A boolean indicating if the file has been written.
@@ -133,26 +305,31 @@ def _write_file(
 
   # Write file
   try:
-    # Check if already exists if yes warning
-    if file_path.is_file():
-      logging.warning('File %s already exists', file_path)
-      return False
-
     # Create parent directory
-    file_path.parent.mkdir(parents=True, exist_ok=True)
+    if create_directory:
+      os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    # Create the file, fails if it already exists
+    file_descriptor = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | _O_BINARY, 0o666)
+
+    try:
+      # Write the file straight from the content buffer, without copy
+      with content.getbuffer() as buffer:
+        written = 0
+        while written < len(buffer):
+          written += os.write(file_descriptor, buffer[written:])
 
-    with open(file_path, 'wb') as file_d:
-      # Write the file
-      file_d.write(content.getbuffer())
+    finally:
+      os.close(file_descriptor)
+
+  except FileExistsError:
+    logging.warning('File %s already exists', file_path)
+    return False
 
   except (OSError, Exception) as err:
     logging.warning('Can\'t write file %s\n%s', file_path, err)
     return False
 
-  # Update its m.a times if not None
-  if atime and mtime:
-    os.utime(file_path, times=(atime, mtime))
-
   return True
 
 def _extract_artefacts_recusrive( 
@@ -160,87 +337,341 @@ def _extract_artefacts_recusrive(
   destination_folder: pathlib.Path,
   log_file_with_artefacts_non_extracted: typing.TextIO,
   archive_name: str = "",
-  archives_with_password: dict = {},
-  report_files: list = [],
-  report_destination_directory: pathlib.Path = None
+  archives_with_password: dict = None,
+  report_files: frozenset = None,
+  report_destination_directory: pathlib.Path = None,
+  jobs: int = 1,
+  set_times: bool = True,
+  include: re.Pattern = None,
+  exclude: re.Pattern = None,
+  scratch_directory: pathlib.Path = None
 ) -> dict:
   """
-  This function opens the 7z file given in parameter, and search for a GetThis.csv file. If found, the file is parsed. Then function iterates on each files and subfolder, if the file was listed in GetThis.csv it writes the sample using `_write_file` (see the docstring for more details).
-  The function logs all files name that could not be write in `log_file_with_artefacts_non_extracted` file.
-  The function is recursively called when 7z files are found.
+  This function opens the 7z file given in parameter, and search for a GetThis.csv file. If found, the file is parsed. Only the files listed in GetThis.csv (and kept by the `include` and `exclude` filters), the report files and the sub 7z files are decompressed.
+  Then function iterates on each files and subfolder, if the file was listed in GetThis.csv it writes the sample using `_write_file` (see the docstring for more details). Samples are written sorted by directory, so each directory is created once.
+  As DFIR-Orc archives are solid, skipped files stored before a wanted file in the same block are still decompressed (but not kept in memory). The filters save the most when the skipped files are at the end of the blocks.
+  The function logs all files name that could not be write in `log_file_with_artefacts_non_extracted` file, as csv rows written by batches.
+  The function is recursively called when 7z files are found. If `jobs` is greater than 1, the sub 7z files are processed in parallel processes (see `_extract_sub_archives_parallel`).
+  The sub 7z files are spilled to temporary files in `scratch_directory` and processed once this archive is closed, so the content of an archive isn't kept in memory while its sub 7z are processed. The memory peak is still the uncompressed size of all the wanted files of one archive (artefacts, report files and sub 7z), as they are all decompressed in memory together before being written or spilled.
 
   Args:
-    archive: The archive to parse. Can be either the file path (for the first call) or the content (for the recusrive calls)
+    archive: The archive to parse. Can be either the file object (for the first call) or the path of the temporary file holding the sub 7z (for the recusrive calls)
     destination_folder: The destination path where to save artefacts.
     log_file_with_artefacts_non_extracted: The file where artefacts SampleName non extracted are logged.
-    archive_name: The archive name. Used for recursive called only where archive is a io.BytesIO (and doesn't contain filename).
+    archive_name: The archive name. Used for recursive called only where archive is a temporary file (and doesn't have the sub 7z filename).
     archives_with_password: The archives with their password if any.
+    report_files: The report files to extract as-is.
+    report_destination_directory: The directory where to save the report files.
+    jobs: The number of processes used to extract the sub 7z files. It is passed down when there is a single sub 7z (like a wrapper around the per-host archives), so the first level with several sub 7z is processed in parallel.
+    set_times: Indicates if the m.a times of the artefacts should be collected, to be set once all files are written.
+    include: If given, only artefacts from GetThis.csv with an original path matching it are extracted.
+    exclude: If given, artefacts from GetThis.csv with an original path matching it are not extracted.
+    scratch_directory: The directory where the sub 7z temporary files are created. The destination folder is used if not given.
 
   Returns:
-    A dictionnary with metadata including volstats.csv file parsed (if found).
+    A dictionnary with metadata including volstats.csv file parsed (if found) and the m.a times to set for each written artefact.
   """
 
+  # Don't share mutable default values between calls
+  archives_with_password = archives_with_password or {}
+  report_files = report_files or frozenset()
+
   getthis_mapping = {}
   
   result = {
-    'volstat':  {}
+    'volstat':  {},
+    'timestamps': []
   }
 
-  # Open archive
+  sub_archives = []
+  prefix = archive_name + '/'
+  endswith = str.endswith
+  log_writer = csv.writer(log_file_with_artefacts_non_extracted)
+  non_extracted = []
+
+  # py7zr is imported only when an archive is opened (it is cached after the first import)
+  from py7zr import SevenZipFile, Bad7zFile
+
+  # Open archive (the password is None if the archive isn't protected)
   try:
-    if archive_name in archives_with_password.keys():
-      archive = SevenZipFile(archive, password=archives_with_password['archive_name'])
-    else:
-      archive = SevenZipFile(archive)
+    sevenzip_file = SevenZipFile(archive, password=archives_with_password.get(archive_name))
   except Bad7zFile:
     logging.warning('%s is not a valid 7z file', archive_name)
-    return False
+    return result
 
-  # Read all the archive content
-  files = archive.readall()
+  # Remove the sub 7z temporary files on all paths, even if something fails after the first one is spilled
+  try:
+    # The archive is closed on all paths when leaving this block
+    with sevenzip_file:
+      # List the archive content without decompressing anything
+      filenames = sevenzip_file.getnames()
 
-  # Check if there is a GetThis.csv and get its content
-  if 'GetThis.csv' in files.keys():
-    getthis_mapping = _parse_getthis(files['GetThis.csv'], destination_folder)
-  
-  # Check if there is a volstats.csv and get its content
-  if 'volstats.csv' in files.keys():
-    result['volstat'] = _parse_volstats(files['volstats.csv'])
+      # Read only the GetThis.csv and volstats.csv files if present
+      files = sevenzip_file.read(targets=[filename for filename in filenames if filename in ('GetThis.csv', 'volstats.csv')])
 
+      # Check if there is a GetThis.csv and get its content
+      if 'GetThis.csv' in files:
+        getthis_mapping = _parse_getthis(files['GetThis.csv'], destination_folder, include=include, exclude=exclude)
+    
+      # Check if there is a volstats.csv and get its content
+      if 'volstats.csv' in files:
+        result['volstat'] = _parse_volstats(files['volstats.csv'])
+
+      # Decompress only the files we need: artefacts listed in GetThis.csv, report files and sub 7z archives
+      wanted = set(getthis_mapping) & set(filenames)
+      wanted |= {filename for filename in filenames if (prefix + filename) in report_files or endswith(filename, '.7z')}
+
+      files = {}
+      if wanted:
+        sevenzip_file.reset()
+        files = sevenzip_file.read(targets=wanted)
+
+      artefacts = []
+
+      # Itterate on each file (pop them to release each content as soon as it is handled)
+      for filename in list(files):
+        file_content = files.pop(filename)
+
+        # Keep the Artefact if in GetThis.csv, with its directory to write them grouped by directory
+        if filename in getthis_mapping:
+          artefacts.append((os.path.dirname(getthis_mapping[filename]['path']), filename, file_content))
+          continue
+
+        # Write the report file and log if something went wrong
+        if (prefix + filename) in report_files:
+          if not _write_file(report_destination_directory.joinpath(filename), file_content):
+            non_extracted.append((archive_name, filename, report_destination_directory.joinpath(filename)))
+    
+        # Spill sub 7z folder to a temporary file, they are processed once this archive is closed.
+        elif endswith(filename, '.7z'):
+          # The temporary file is created in the scratch directory, on disk by default as the system temporary directory may be in memory (tmpfs)
+          with tempfile.NamedTemporaryFile(prefix='sub_archive_', suffix='.7z', dir=scratch_directory or destination_folder, delete=False) as sub_archive_fd:
+            sub_archives.append((filename, sub_archive_fd.name))
+            shutil.copyfileobj(file_content, sub_archive_fd, _COPY_BUFFER_SIZE)
 
-  # Itterate on each file
-  for filename, file_content in files.items():
+        file_content.close()
+        file_content = None
 
-    # Write the Artefact if in GetThis.csv and log if something went wrong
-    if filename in getthis_mapping.keys():
-      if not _write_file(getthis_mapping[filename]['path'], file_content, mtime=getthis_mapping[filename]['mtime'], atime=getthis_mapping[filename]['atime']):
-        log_file_with_artefacts_non_extracted.write(f'{archive_name},{filename},{getthis_mapping[filename]}\n')
+      # Sort the Artefacts by directory (reversed to pop them in order and release each content once written)
+      artefacts.sort(key=operator.itemgetter(0), reverse=True)
+      current_directory = None
 
-    # Write the report file and log if something went wrong
-    elif f'{archive_name}/{filename}' in report_files:
-      if not _write_file(report_destination_directory.joinpath(filename), file_content):
-        log_file_with_artefacts_non_extracted.write(f'{archive_name},{filename},{report_destination_directory.joinpath(filename)}\n')
-  
-    # Rerun on sub 7z folder.
-    elif filename.endswith('.7z'):
-      sub_call_result = _extract_artefacts_recusrive(
-        file_content,
+      while artefacts:
+        directory, filename, file_content = artefacts.pop()
+
+        # Write the Artefact and log if something went wrong. Its directory is created by the first write in it.
+        if not _write_file(getthis_mapping[filename]['path'], file_content, create_directory=directory != current_directory):
+          non_extracted.append((archive_name, filename, getthis_mapping[filename]['path']))
+        elif set_times:
+          result['timestamps'].append((getthis_mapping[filename]['path'], getthis_mapping[filename]['atime'], getthis_mapping[filename]['mtime']))
+
+        current_directory = directory
+
+        file_content.close()
+        file_content = None
+
+        # Log the artefacts non extracted by batches
+        if len(non_extracted) >= _LOG_BATCH_SIZE:
+          log_writer.writerows(non_extracted)
+          non_extracted.clear()
+
+      log_writer.writerows(non_extracted)
+
+    # Rerun on sub 7z folder, in parallel processes if asked.
+    if jobs > 1 and len(sub_archives) > 1:
+      sub_call_results = _extract_sub_archives_parallel(
+        sub_archives,
         destination_folder,
         log_file_with_artefacts_non_extracted,
-        archive_name=filename,
+        jobs,
         archives_with_password=archives_with_password,
         report_files=report_files,
-        report_destination_directory=report_destination_directory
+        report_destination_directory=report_destination_directory,
+        set_times=set_times,
+        include=include,
+        exclude=exclude,
+        scratch_directory=scratch_directory or destination_folder
+      )
+    else:
+      sub_call_results = (
+        _extract_artefacts_recusrive(
+          pathlib.Path(sub_archive_path),
+          destination_folder,
+          log_file_with_artefacts_non_extracted,
+          archive_name=filename,
+          archives_with_password=archives_with_password,
+          report_files=report_files,
+          report_destination_directory=report_destination_directory,
+          jobs=jobs,
+          set_times=set_times,
+          include=include,
+          exclude=exclude,
+          scratch_directory=scratch_directory
+        )
+        for filename, sub_archive_path in sub_archives
       )
 
-      # Merge sub call results
-      ## We merge the volstat result from sub call with the ones of this call. Rewrite this call result with subcall result.
+    # Merge sub call results
+    ## We merge the volstat result from sub call with the ones of this call. Rewrite this call result with subcall result.
+    ## The timestamps from sub call are appended to the ones of this call.
+    for sub_call_result in sub_call_results:
       result['volstat'] = {**result['volstat'], **sub_call_result['volstat']}
+      result['timestamps'] += sub_call_result['timestamps']
 
-  archive.close()
+  finally:
+    for _, sub_archive_path in sub_archives:
+      os.unlink(sub_archive_path)
 
   return result
 
+def _init_worker(
+  context: dict,
+  worker_logs_directory: str
+) -> None:
+  """
+  This function is run once by each worker process of `_extract_sub_archives_parallel`. It binds the arguments shared by all the sub 7z files to `_worker_context`, so they are sent once per process instead of once per sub 7z.
+  It also creates (or truncates) the worker log file `artefacts_non_extracted.<pid>.csv` under `worker_logs_directory`.
+
+  Args:
+    context: The `_extract_artefacts_recusrive` arguments shared by all the sub 7z files, including `destination_folder`.
+    worker_logs_directory: The directory where the worker log files are created.
+  """
+  global _worker_context, _worker_log_path
+  _worker_context = context
+  _worker_log_path = os.path.join(worker_logs_directory, f'artefacts_non_extracted.{os.getpid()}.csv')
+
+  open(_worker_log_path, 'w').close()
+
+def _extract_sub_archive_worker(
+  archive_path: pathlib.Path,
+  archive_name: str
+) -> dict:
+  """
+  This function runs `_extract_artefacts_recusrive` on a sub 7z file inside a worker process, with the arguments bound by `_init_worker`.
+  As the log file of the parent process can't be shared, each worker process logs the artefacts non extracted in its own log file created by `_init_worker`.
+
+  Args:
+    archive_path: The path of the temporary file holding the sub 7z.
+    archive_name: The sub 7z name.
+
+  Returns:
+    The result of `_extract_artefacts_recusrive`.
+  """
+
+  context = dict(_worker_context)
+  destination_folder = context.pop('destination_folder')
+
+  with open(_worker_log_path, 'a', newline='', buffering=_LOG_BUFFER_SIZE) as log_file_with_artefacts_non_extracted:
+    result = _extract_artefacts_recusrive(
+      archive_path,
+      destination_folder,
+      log_file_with_artefacts_non_extracted,
+      archive_name=archive_name,
+      **context
+    )
+
+  return result
+
+def _extract_sub_archives_parallel(
+  sub_archives: list,
+  destination_folder: pathlib.Path,
+  log_file_with_artefacts_non_extracted: typing.TextIO,
+  jobs: int,
+  archives_with_password: dict,
+  report_files: frozenset,
+  report_destination_directory: pathlib.Path,
+  set_times: bool,
+  include: re.Pattern,
+  exclude: re.Pattern,
+  scratch_directory: pathlib.Path
+) -> list:
+  """
+  This function extracts the given sub 7z files in a pool of `jobs` processes.
+  Sub 7z files from a DFIR-Orc archive don't share anything, so each one is handled by `_extract_sub_archive_worker`. Once all of them are done, the worker log files are appended to `log_file_with_artefacts_non_extracted`.
+  The worker log files are created in a new temporary directory under `scratch_directory`, removed on all paths.
+  The other arguments are the same for all the sub 7z files, they are given once to each worker process (see `_init_worker`).
+
+  Args:
+    sub_archives: A list of (archive name, temporary file path) for each sub 7z.
+    destination_folder: The destination path where to save artefacts.
+    log_file_with_artefacts_non_extracted: The file where artefacts SampleName non extracted are logged.
+    jobs: The maximum number of processes to use.
+    archives_with_password: The archives with their password if any.
+    report_files: The report files to extract as-is.
+    report_destination_directory: The directory where to save the report files.
+    set_times: Indicates if the m.a times of the artefacts should be collected.
+    include: If given, only artefacts with an original path matching it are extracted.
+    exclude: If given, artefacts with an original path matching it are not extracted.
+    scratch_directory: The directory where the sub 7z temporary files and the worker log files are created.
+
+  Returns:
+    The list of `_extract_artefacts_recusrive` results for each sub 7z.
+  """
+
+  context = {
+    'destination_folder': destination_folder,
+    'archives_with_password': archives_with_password,
+    'report_files': report_files,
+    'report_destination_directory': report_destination_directory,
+    'set_times': set_times,
+    'include': include,
+    'exclude': exclude,
+    'scratch_directory': scratch_directory
+  }
+
+  results = []
+
+  # Start workers from a forkserver when available: this script and py7zr are imported once in the server and inherited by each worker
+  # The preload list is global to the process and replaced by this call, so it is only set when this script is the one running (not imported by another program)
+  mp_context = None
+  if 'forkserver' in multiprocessing.get_all_start_methods():
+    mp_context = multiprocessing.get_context('forkserver')
+    if __name__ == '__main__':
+      mp_context.set_forkserver_preload(['__main__', 'py7zr'])
+
+  # A new directory for this pool, so no log file from a previous run can be merged
+  worker_logs_directory = tempfile.mkdtemp(prefix='worker_logs_', dir=scratch_directory)
+
+  try:
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(sub_archives)), mp_context=mp_context, initializer=_init_worker, initargs=(context, worker_logs_directory)) as executor:
+      futures = [
+        executor.submit(_extract_sub_archive_worker, pathlib.Path(sub_archive_path), filename)
+        for filename, sub_archive_path in sub_archives
+      ]
+
+      for future in futures:
+        results.append(future.result())
+
+    # Concatenate worker log files in the main one
+    for log_name in sorted(os.listdir(worker_logs_directory)):
+      with open(os.path.join(worker_logs_directory, log_name), newline='') as worker_log_fd:
+        shutil.copyfileobj(worker_log_fd, log_file_with_artefacts_non_extracted)
+
+  finally:
+    shutil.rmtree(worker_logs_directory, ignore_errors=True)
+
+  return results
+
+def _apply_timestamps(
+  timestamps: list
+) -> None:
+  """
+  This function sets the m.a times of the written artefacts in a single pass, once all of them are written.
+
+  Args:
+    timestamps: A list of (file path, atime, mtime) as collected by `_extract_artefacts_recusrive`.
+  """
+
+  # Don't follow symbolic links when the OS allows it
+  follow_symlinks = os.utime not in os.supports_follow_symlinks
+
+  for file_path, atime, mtime in timestamps:
+    if atime and mtime:
+      try:
+        os.utime(file_path, times=(atime, mtime), follow_symlinks=follow_symlinks)
+      except OSError as err:
+        logging.warning('Can\'t set times of file %s\n%s', file_path, err)
+
 def _rename_volumes(
   destination_folder: pathlib.Path,
   volumeid_mapped_to_drive_letter: dict
@@ -255,21 +686,33 @@ def _rename_volumes(
     volumeid_mapped_to_drive_letter: A dictionnary containing a mapping from VolumeID with their respective mounted drive letter.
   """
 
+  # List the folders in `destination_folder` once, sorted to find the ones starting with a Volume ID by bisection
+  with os.scandir(destination_folder) as entries:
+    folder_names = sorted(entry.name for entry in entries if entry.is_dir())
+
   # For each Volume ID in volumeid_mapped_to_drive_letter
-  for volume_id in volumeid_mapped_to_drive_letter.keys():
+  for volume_id, drive_letter in volumeid_mapped_to_drive_letter.items():
 
-    # Check for folder in `destination_folder` starting with the Volume ID
-    for dir in destination_folder.glob(f'{volume_id}*'):
-      
-      # And rename the folder, with a new name (we specify the full path as pathlib.rename assumes relative pathes are under the working directory and not the filepath root parent) 
-      dir.rename(destination_folder.joinpath(dir.name.replace(volume_id, volumeid_mapped_to_drive_letter[volume_id]))) 
+    # Check for folders starting with the Volume ID (the volume folder and its vsc folders)
+    index = bisect.bisect_left(folder_names, volume_id)
+    while index < len(folder_names) and folder_names[index].startswith(volume_id):
+      folder_name = folder_names[index]
+      index += 1
+
+      # And rename the folder, with a new name (we specify the full path as os.rename assumes relative pathes are under the working directory and not the filepath root parent)
+      os.rename(os.path.join(destination_folder, folder_name), os.path.join(destination_folder, folder_name.replace(volume_id, drive_letter)))
 
 
 def artefact_rebuilder( 
   archive_path: pathlib.Path,
   destination_folder: pathlib.Path,
   configuration_file_path: pathlib.Path = None,
-  rename_volumes: bool = True
+  rename_volumes: bool = True,
+  jobs: int = 1,
+  set_times: bool = True,
+  include: list = None,
+  exclude: list = None,
+  temp_directory: pathlib.Path = None
 ) -> None:
   """
   Extract all artefacts from a DFIR-Orc archive by re-building their original path and extension
@@ -279,43 +722,70 @@ def artefact_rebuilder(
     destination_folder: The destination path where to save artefacts.
     configuration_file_path: The configuration file to use.
     rename_volumes: Indicates if the function should rename the volumes.
+    jobs: The number of processes used to extract sub 7z files. 0 uses the number of CPUs (up to 12).
+    set_times: Indicates if the function should set the artefacts m.a times from GetThis.csv.
+    include: fnmatch patterns of the artefacts original paths to extract (like `*.evtx`). All artefacts are extracted if empty.
+    exclude: fnmatch patterns of the artefacts original paths to skip.
+    temp_directory: The directory where the scratch directory (holding the sub 7z temporary files) is created. The destination folder is used if not given.
   """
 
   log_path_of_artefacts_non_extracted = destination_folder.joinpath('artefacts_non_extracted.csv')
   archives_with_password = {}
-  report_files = []
+  report_files = frozenset()
   report_destination_directory = None
   extract_results = {}
 
+  # Use the number of CPUs if no jobs count is given
+  if jobs < 1:
+    jobs = min(os.cpu_count() or 1, _MAX_JOBS)
+
   # If destination_folder doesn't exists, creates it
   destination_folder.mkdir(exist_ok=True)
 
-  # Load configuration if any.
+  # Load configuration if any. It is parsed once, sub calls and worker processes get the parsed values.
   if configuration_file_path:
+    import tomllib
+
     with open(configuration_file_path, "rb") as configuration_fd:
       configuration = tomllib.load(configuration_fd)
 
       archives_with_password = configuration['protected']['sub_archive']
-      report_files = configuration['reports']['filenames']
+      report_files = frozenset(configuration['reports']['filenames'])
 
       # Create the directory where to put reports
       report_destination_directory = destination_folder.joinpath(configuration['reports']['target_directory'])
       report_destination_directory.mkdir(exist_ok=True)
 
-  # Open the logging file and start archive extraction
-  with open(log_path_of_artefacts_non_extracted, 'w') as log_file_of_artefacts_non_extracted:
+  # The sub 7z temporary files are written in a dedicated scratch directory, removed once the extraction is done (even if it fails)
+  scratch_directory = pathlib.Path(tempfile.mkdtemp(prefix='dfir-orc-archive-rebuilder-scratch-', dir=temp_directory or destination_folder))
+
+  try:
+    # Open the logging file and start archive extraction
+    with open(log_path_of_artefacts_non_extracted, 'w', newline='', buffering=_LOG_BUFFER_SIZE) as log_file_of_artefacts_non_extracted:
 
-    log_file_of_artefacts_non_extracted.write('Archive Name,Artefact Name,Expected Target Path\n')
+      csv.writer(log_file_of_artefacts_non_extracted).writerow(['Archive Name', 'Artefact Name', 'Expected Target Path'])
     
-    extract_results = _extract_artefacts_recusrive(
-      archive_path,
-      destination_folder,
-      log_file_of_artefacts_non_extracted,
-      archive_name='.',
-      archives_with_password=archives_with_password,
-      report_files=report_files,
-      report_destination_directory=report_destination_directory
-    )
+      extract_results = _extract_artefacts_recusrive(
+        archive_path,
+        destination_folder,
+        log_file_of_artefacts_non_extracted,
+        archive_name='.',
+        archives_with_password=archives_with_password,
+        report_files=report_files,
+        report_destination_directory=report_destination_directory,
+        jobs=jobs,
+        set_times=set_times,
+        include=_compile_patterns(include),
+        exclude=_compile_patterns(exclude),
+        scratch_directory=scratch_directory
+      )
+
+  finally:
+    shutil.rmtree(scratch_directory, ignore_errors=True)
+
+  # Set the artefacts m.a times once all of them are written
+  if set_times:
+    _apply_timestamps(extract_results['timestamps'])
 
   # Rename volumes with mapped letter
   if rename_volumes:
@@ -335,6 +805,16 @@ if __name__ == "__main__":
 
   parser.add_argument('-c', '--conf', '--conf-file', help='The folder where to save the artefacts', type=argparse.FileType('rb'))
 
+  parser.add_argument('-j', '--jobs', help='The number of processes used to extract sub 7z files (0 to use the number of CPUs)', type=int, default=1)
+
+  parser.add_argument('--no-times', help='Don\'t set the artefacts modified and access times from GetThis.csv', dest='set_times', action='store_false')
+
+  parser.add_argument('--include', help='Extract only the artefacts whose original path matches this pattern (like *.evtx or /Users/*/NTUSER.DAT). Can be repeated', action='append', metavar='PATTERN')
+
+  parser.add_argument('--exclude', help='Skip the artefacts whose original path matches this pattern. Can be repeated', action='append', metavar='PATTERN')
+
+  parser.add_argument('--temp-dir', help='The folder where the sub 7z files are temporarily extracted (default to a scratch folder in the destination folder)', type=pathlib.Path)
+
   args = parser.parse_args()
 
-  artefact_rebuilder(args.orc_archive, args.destination_folder, configuration_file_path=args.conf.name)
+  artefact_rebuilder(args.orc_archive, args.destination_folder, configuration_file_path=args.conf.name if args.conf else None, jobs=args.jobs, set_times=args.set_times, include=args.include, exclude=args.exclude, temp_directory=args.temp_dir)